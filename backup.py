@@ -1,100 +1,122 @@
 import os
-import json # Still needed for potential future use or if other parts of the system rely on it
+import json
 import argparse
-import pickle
 from datetime import datetime
 from pathlib import Path
 import time
 import subprocess
-import uuid
-import re
 import sys
+import io
+import math
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-from google.auth.transport.requests import Request, AuthorizedSession
-from google_auth_oauthlib.flow import InstalledAppFlow
+# The Google client libraries take hundreds of milliseconds to import, so they are imported
+# inside the functions that talk to Drive rather than here.
 
 # --- CONFIGURATION ---
 SCOPES = ['https://www.googleapis.com/auth/drive.file']
 CREDENTIALS_FILE = 'credentials.json'
-TOKEN_FILE = 'token.pkl'
+TOKEN_FILE = 'token.json'
 DRIVE_FOLDER_NAME = 'Backups'
+# The Drive folder ID is cached here so most runs skip the folder lookup round-trip.
+FOLDER_ID_CACHE = 'drive_folder.json'
+FOLDER_ID_CACHE_TTL = 7 * 86400 # seconds
 
 # IMPORTANT: Set a strong password for 7z archive encryption.
 # For production, consider reading this from an environment variable or secure prompt.
 COMPRESSION_PASSWORD = "YourSecure7zPasswordHere"
 
+# 7z compression level (0-9). Phone backups are mostly JPEG/MP4, which are already
+# compressed, so -mx=9 costs several times the CPU of -mx=5 for under 1% smaller archives.
+DEFAULT_COMPRESSION_LEVEL = 5
+
+# Resumable upload chunk size. Each chunk is one HTTP request, so the 1 MiB library default
+# spends most of a large upload waiting on round-trips.
+DEFAULT_CHUNK_SIZE_MIB = 16
+
+# A resumable upload only ever has one chunk in flight, so archives larger than UPLOAD_PART_SIZE
+# are uploaded as up to MAX_UPLOAD_PARTS parts in parallel, plus a manifest that restore.py
+# uses to join them back together.
+UPLOAD_PART_SIZE = 256 * 1024 * 1024
+MAX_UPLOAD_PARTS = 8
+MANIFEST_SUFFIX = '.manifest.json'
+
+# Drive API calls are retried with exponential backoff (by googleapiclient's num_retries) on
+# rate limits (429, 403 rateLimitExceeded) and transient 5xx errors.
+MAX_RETRIES = 6
+
+# Minimum time between progress bar redraws, in seconds.
+PROGRESS_INTERVAL = 0.25
+# Progress bar width, with every fill level rendered once up front. Logs and pipes get plain
+# ASCII instead of block characters and emoji.
+BAR_LENGTH = 20
+_TTY = sys.stdout.isatty()
+_BAR_FILL, _BAR_EMPTY, _ETA_LABEL = ('█', '░', '⏱️') if _TTY else ('#', '-', 'ETA')
+_BARS = tuple(_BAR_FILL * i + _BAR_EMPTY * (BAR_LENGTH - i) for i in range(BAR_LENGTH + 1))
+_KB, _MB, _GB = 1024, 1024**2, 1024**3
+
+# Manual mappings for specific folder combinations or single folders, used by generate_label
+_LABEL_MAP = {
+    "WhatsApp/Media": "wa-media",
+    "DCIM/Camera": "dcim-photos",
+    "Download/Documents": "d-doc", # New specific mapping for this combination
+    "Documents": "doc", # General mapping for "Documents" if not part of "Download/Documents"
+    "Media": "wa-media", # General mapping for "Media" if not part of "WhatsApp/Media"
+    "Camera": "dcim-photos", # General mapping for "Camera" if not part of "DCIM/Camera"
+    "Download": "dl",
+    "Pictures": "pics",
+    "Movies": "vids",
+    "Music": "audio",
+    "Android": "android-data",
+    "DCIM": "dcim",
+    "WhatsApp": "wa",
+    "Telegram": "tg",
+    "Signal": "signal",
+    "Viber": "viber",
+    "Snapchat": "snap",
+    "Instagram": "ig",
+    "Facebook": "fb",
+    "Twitter": "x",
+    "TikTok": "tiktok",
+    "Downloads": "dl",
+    "Screenshots": "ss",
+    "Recordings": "recs",
+    "Audio": "audio",
+    "Video": "video",
+    "Books": "books",
+    "Archives": "archives",
+    "Backups": "backups",
+    "Configs": "configs",
+    "Logs": "logs",
+    "Temp": "temp",
+    "System": "sys",
+    "Data": "data",
+    "Files": "files",
+    "Other": "other",
+}
+
 def generate_label(source_path):
-    # Remove trailing slash if present and get the last component of the path
+    # normpath removes a trailing slash; the last two components are all we need
     normalized_path = os.path.normpath(source_path)
-    path_parts = Path(normalized_path).parts
+    path_parts = normalized_path.rsplit(os.sep, 2) if normalized_path != os.curdir else [""]
+    last_folder = path_parts[-1]
 
-    # Consider the last two parts for more specific labels
-    # Ensure there are at least two parts to avoid index errors for short paths
-    if len(path_parts) >= 2:
-        # Join the last two parts with a '/' to match mapping keys like "WhatsApp/Media"
-        last_two_parts = f"{path_parts[-2]}/{path_parts[-1]}"
-    else:
-        last_two_parts = None # Not enough parts for a two-part label
-
-    # Get the last folder name for single-folder labels or fallback
-    last_folder = path_parts[-1] if path_parts else ""
-
-    # Manual mappings for specific folder combinations or single folders
-    mapping = {
-        "WhatsApp/Media": "wa-media",
-        "DCIM/Camera": "dcim-photos",
-        "Download/Documents": "d-doc", # New specific mapping for this combination
-        "Documents": "doc", # General mapping for "Documents" if not part of "Download/Documents"
-        "Media": "wa-media", # General mapping for "Media" if not part of "WhatsApp/Media"
-        "Camera": "dcim-photos", # General mapping for "Camera" if not part of "DCIM/Camera"
-        "Download": "dl",
-        "Pictures": "pics",
-        "Movies": "vids",
-        "Music": "audio",
-        "Android": "android-data",
-        "DCIM": "dcim",
-        "WhatsApp": "wa",
-        "Telegram": "tg",
-        "Signal": "signal",
-        "Viber": "viber",
-        "Snapchat": "snap",
-        "Instagram": "ig",
-        "Facebook": "fb",
-        "Twitter": "x",
-        "TikTok": "tiktok",
-        "Downloads": "dl",
-        "Screenshots": "ss",
-        "Recordings": "recs",
-        "Audio": "audio",
-        "Video": "video",
-        "Books": "books",
-        "Archives": "archives",
-        "Backups": "backups",
-        "Configs": "configs",
-        "Logs": "logs",
-        "Temp": "temp",
-        "System": "sys",
-        "Data": "data",
-        "Files": "files",
-        "Other": "other",
-    }
+    # Join the last two parts with a '/' to match mapping keys like "WhatsApp/Media"
+    last_two_parts = f"{path_parts[-2]}/{last_folder}" if len(path_parts) >= 2 else None
 
-    # Try to match the last two parts first (most specific)
-    if last_two_parts and last_two_parts in mapping:
-        return mapping[last_two_parts]
-    # Then try to match just the last folder (less specific)
-    elif last_folder in mapping:
-        return mapping[last_folder]
-    # Fallback to generic conversion (lowercase, replace spaces with hyphens)
-    else:
-        return last_folder.lower().replace(" ", "-")
+    # Try the last two parts first (most specific), then just the last folder (less specific),
+    # then fall back to generic conversion (lowercase, replace spaces with hyphens)
+    return (_LABEL_MAP.get(last_two_parts)
+            or _LABEL_MAP.get(last_folder)
+            or last_folder.lower().replace(" ", "-"))
 
 
-def create_backup(source_dir, destination_dir, backup_name, password):
+def create_backup(source_dir, destination_dir, backup_name, password, level=DEFAULT_COMPRESSION_LEVEL, threads=None):
     """
     Creates a backup of the source directory into a .7z file.
+    threads caps the number of 7z compression threads (None uses all CPU cores).
     Returns the path to the created 7z file.
     """
     source_path = Path(source_dir)
@@ -109,29 +131,21 @@ def create_backup(source_dir, destination_dir, backup_name, password):
     archive_file_path = destination_path / f"{backup_name}.7z"
 
     print(f"Creating backup: {archive_file_path} using 7z...")
-    # 7z command: a (add), -t7z (7z format), -mx=9 (ultra compression), -mhe=on (encrypt headers)
-    # -p (password)
+    # 7z command: a (add), -t7z (7z format), -mx (compression level), -mhe=on (encrypt headers)
+    # -mmt (compression threads; LZMA2 compresses independent blocks in parallel), -p (password)
     # 7z inherently preserves modification times (mtime) during compression and extraction.
     try:
-        # To ensure the 7z progress bar renders correctly, we'll execute it via a temporary shell script.
-        # This helps ensure it has a proper TTY context for rendering the progress bar.
-        command_str = f"7z a -t7z -mx=9 -mhe=on -bsp1 -p'{password}' '{str(archive_file_path)}' '{str(source_path)}'"
-        
-        script_path = Path(destination_dir) / f"temp_backup_command_{uuid.uuid4().hex}.sh"
-        with open(script_path, "w") as f:
-            f.write("#!/bin/bash\n")
-            f.write(command_str + "\n")
-            
-        # Make the script executable
-        os.chmod(script_path, 0o755)
-
-        print(f"Creating backup: {archive_file_path} using 7z...")
-        
-        # Execute the script, letting its output go directly to the terminal.
-        process = subprocess.run([str(script_path)])
-
-        # Clean up the temporary script
-        os.remove(script_path)
+        command = [
+            "7z", "a",
+            "-t7z", f"-mx={level}", "-mhe=on", f"-mmt={threads or 'on'}",
+            "-bsp1", # Progress bar on stdout
+            f"-p{password}",
+            str(archive_file_path),
+            str(source_path)
+        ]
+
+        # 7z inherits our stdout/stderr, so its progress bar renders directly on the terminal.
+        process = subprocess.run(command)
 
         if process.returncode != 0:
             print(f"\nError: 7z compression failed. See output above for details.")
@@ -146,34 +160,157 @@ def create_backup(source_dir, destination_dir, backup_name, password):
         print(f"An unexpected error occurred during 7z compression: {e}")
         return None
 
-def authenticate_google_drive():
-    """Authenticates with Google Drive API."""
+def scan_files(root):
+    """Yields a DirEntry for every regular file under root, without following symlinks."""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+def source_fingerprint(source_dir):
+    """
+    Returns a sha256 over the path, size and modification time of every file under source_dir.
+
+    Only metadata is read (one stat per file, taken from the scandir entry), so this is far
+    cheaper than compressing. The archive itself can't be used for this: 7z encrypts every
+    archive with a fresh random salt/IV, so identical sources never produce identical bytes.
+    """
+    rows = []
+    for entry in scan_files(source_dir):
+        st = entry.stat(follow_symlinks=False)
+        rows.append(f"{os.path.relpath(entry.path, source_dir)}\0{st.st_size}\0{st.st_mtime_ns}\n")
+    rows.sort()
+
+    digest = hashlib.sha256(os.path.abspath(source_dir).encode('utf-8', 'surrogateescape'))
+    for row in rows:
+        digest.update(row.encode('utf-8', 'surrogateescape'))
+    return digest.hexdigest()
+
+def authenticate_google_drive(interactive=True):
+    """
+    Authenticates with Google Drive API.
+    With interactive=False, returns None instead of starting the browser login flow.
+    """
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
     creds = None
     if os.path.exists(TOKEN_FILE):
-        with open(TOKEN_FILE, 'rb') as token:
-            creds = pickle.load(token)
+        creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
             creds.refresh(Request())
+        elif not interactive:
+            return None
         else:
             flow = InstalledAppFlow.from_client_secrets_file(
                 CREDENTIALS_FILE, SCOPES)
             creds = flow.run_local_server(port=0, open_browser=False, success_message='Authentication complete. You can close this tab.')
-        with open(TOKEN_FILE, 'wb') as token:
-            pickle.dump(creds, token)
+        Path(TOKEN_FILE).write_text(creds.to_json())
     return creds
 
 import sys
 
-def upload_to_drive(service, file_path, folder_id):
+def load_cached_folder_id():
+    """Returns the cached DRIVE_FOLDER_NAME folder ID, or None if the cache is missing or older than the TTL."""
+    try:
+        if time.time() - os.path.getmtime(FOLDER_ID_CACHE) >= FOLDER_ID_CACHE_TTL:
+            return None
+        with open(FOLDER_ID_CACHE, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cache.get('name') != DRIVE_FOLDER_NAME:
+        return None
+    return cache.get('folder_id')
+
+def save_cached_folder_id(folder_id):
+    try:
+        with open(FOLDER_ID_CACHE, 'w') as f:
+            json.dump({'name': DRIVE_FOLDER_NAME, 'folder_id': folder_id}, f)
+    except OSError as e:
+        print(f"Warning: could not write {FOLDER_ID_CACHE}: {e}")
+
+def invalidate_cached_folder_id():
+    try:
+        os.remove(FOLDER_ID_CACHE)
+    except FileNotFoundError:
+        pass
+
+def get_drive_folder_id(service, use_cache=True):
+    """Returns the ID of the DRIVE_FOLDER_NAME folder, creating the folder if it doesn't exist."""
+    if use_cache:
+        folder_id = load_cached_folder_id()
+        if folder_id:
+            return folder_id
+
+    folder_id = lookup_drive_folder_id(service)
+    save_cached_folder_id(folder_id)
+    return folder_id
+
+def lookup_drive_folder_id(service):
+    """Finds (or creates) the DRIVE_FOLDER_NAME folder on Google Drive and returns its ID."""
+    results = service.files().list(
+        q=f"name='{DRIVE_FOLDER_NAME}' and mimeType='application/vnd.google-apps.folder'",
+        spaces='drive',
+        fields='files(id, name)'
+    ).execute(num_retries=MAX_RETRIES)
+
+    items = results.get('files', [])
+    if items:
+        return items[0]['id']
+
+    print(f"'{DRIVE_FOLDER_NAME}' folder not found. Creating it...")
+    file_metadata = {
+        'name': DRIVE_FOLDER_NAME,
+        'mimeType': 'application/vnd.google-apps.folder'
+    }
+    folder = service.files().create(body=file_metadata, fields='id').execute(num_retries=MAX_RETRIES)
+    return folder.get('id')
+
+def find_backup_by_fingerprint(service, folder_id, fingerprint):
+    """Returns the Drive file (archive or manifest) previously uploaded for this source fingerprint, or None."""
+    results = service.files().list(
+        q=(f"'{folder_id}' in parents and trashed = false and "
+           f"appProperties has {{ key='source_sha256' and value='{fingerprint}' }}"),
+        spaces='drive',
+        fields='files(id, name, webViewLink)'
+    ).execute(num_retries=MAX_RETRIES)
+    items = results.get('files', [])
+    return items[0] if items else None
+
+def connect_drive(interactive=True):
+    """
+    Authenticates and resolves the backup folder.
+    Returns (credentials, service, folder_id), or None if authentication failed.
+    """
+    from googleapiclient.discovery import build
+
+    credentials = authenticate_google_drive(interactive)
+    if not credentials:
+        return None
+    service = build('drive', 'v3', credentials=credentials)
+    return credentials, service, get_drive_folder_id(service)
+
+def upload_to_drive(service, file_path, folder_id, chunk_size_mib=DEFAULT_CHUNK_SIZE_MIB, app_properties=None):
+    from googleapiclient.http import MediaFileUpload
+
     file_name = os.path.basename(file_path)
 
     file_metadata = {
         'name': file_name,
         'parents': [folder_id]
     }
+    if app_properties:
+        file_metadata['appProperties'] = app_properties
 
-    media = MediaFileUpload(file_path, mimetype='application/x-7z-compressed', resumable=True)
+    media = MediaFileUpload(file_path, mimetype='application/x-7z-compressed', resumable=True,
+                            chunksize=chunk_size_mib * 1024 * 1024)
 
     request = service.files().create(
         body=file_metadata,
@@ -183,17 +320,17 @@ def upload_to_drive(service, file_path, folder_id):
 
     file_size = os.path.getsize(file_path)
     start_time = time.time()
-    last_printed_percentage = -1 # Initialize for print_progress_bar
+    last_update_ts = 0 # Initialize for print_progress_bar
 
     print(f"Uploading '{file_name}' to Google Drive...")
 
     response = None
     while response is None:
-        status, response = request.next_chunk()
+        status, response = request.next_chunk(num_retries=MAX_RETRIES)
         if status:
             uploaded_bytes = status.resumable_progress
-            last_printed_percentage = print_progress_bar(
-                uploaded_bytes, file_size, start_time, last_printed_percentage, prefix="Uploading"
+            last_update_ts = print_progress_bar(
+                uploaded_bytes, file_size, start_time, last_update_ts, prefix="Uploading"
             )
 
     sys.stdout.write("\r✅ Upload complete!          \n") # Clear the line and print final message
@@ -201,80 +338,269 @@ def upload_to_drive(service, file_path, folder_id):
     print(" Web view link:", response.get("webViewLink"))
     return response.get("webViewLink")
 
-def print_progress_bar(current_bytes, total_bytes, start_time, last_printed_percentage, prefix="Transferring"):
+class FileSlice(io.RawIOBase):
+    """
+    Read-only, seekable view of `length` bytes of a file starting at `offset`.
+    The bytes are hashed as they are first read, so an upload gets the slice's sha256 for free.
+    """
+
+    def __init__(self, path, offset, length):
+        super().__init__()
+        self._fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        self._offset = offset
+        self._length = length
+        self._pos = 0
+        self._digest = hashlib.sha256()
+        self._hashed = 0 # Bytes fed to _digest so far; re-reads of a retried chunk are skipped
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, pos, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            pos += self._pos
+        elif whence == io.SEEK_END:
+            pos += self._length
+        self._pos = max(0, min(pos, self._length))
+        return self._pos
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._length - self._pos)
+        if size <= 0:
+            return 0
+        os.lseek(self._fd, self._offset + self._pos, os.SEEK_SET)
+        data = os.read(self._fd, size)
+        buffer[:len(data)] = data
+        if self._pos <= self._hashed < self._pos + len(data):
+            self._digest.update(data[self._hashed - self._pos:])
+            self._hashed = self._pos + len(data)
+        self._pos += len(data)
+        return len(data)
+
+    def sha256(self):
+        """Returns the hex sha256 of the slice, or None if not every byte has been read yet."""
+        return self._digest.hexdigest() if self._hashed == self._length else None
+
+    def close(self):
+        if not self.closed:
+            os.close(self._fd)
+        super().close()
+
+def sha256_of_range(path, offset, length, block_size=8 * 1024 * 1024):
+    """Returns the hex sha256 of `length` bytes of a file starting at `offset`."""
+    digest = hashlib.sha256()
+    with FileSlice(path, offset, length) as part:
+        while block := part.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+def delete_drive_files(service, file_ids):
+    """Deletes the uploaded parts of a failed multi-part upload, warning about any that remain."""
+    if not file_ids:
+        return
+    print(f"\nUpload failed. Removing {len(file_ids)} uploaded part(s) from Google Drive...")
+    for file_id in file_ids:
+        try:
+            service.files().delete(fileId=file_id).execute(num_retries=MAX_RETRIES)
+        except Exception as e:
+            print(f"Warning: could not delete uploaded part {file_id}: {e}")
+
+def upload_parts_to_drive(credentials, file_path, folder_id, chunk_size_mib=DEFAULT_CHUNK_SIZE_MIB, app_properties=None):
+    """
+    Uploads a large archive as several parts in parallel, followed by a JSON manifest.
+
+    Drive has no server-side compose, so each part is stored as its own file
+    ('<archive>.partNN') and the manifest records the order, sizes and sha256 of
+    the parts so restore.py can join and verify them.
+    Returns the web view link of the manifest.
+    """
+    from googleapiclient.discovery import build
+    from googleapiclient.http import MediaIoBaseUpload
+
+    file_name = os.path.basename(file_path)
+    file_size = os.path.getsize(file_path)
+    num_parts = min(MAX_UPLOAD_PARTS, math.ceil(file_size / UPLOAD_PART_SIZE))
+    part_size = math.ceil(file_size / num_parts)
+    ranges = [(offset, min(part_size, file_size - offset)) for offset in range(0, file_size, part_size)]
+
+    progress = [0] * len(ranges)
+    progress_lock = threading.Lock()
+    # When one part fails the others stop at their next chunk, and every part that was
+    # already created is deleted again so a failed backup leaves nothing on Drive.
+    cancelled = threading.Event()
+    created_ids = []
+    start_time = time.time()
+    last_update_ts = 0 # Initialize for print_progress_bar
+
+    def upload_part(index):
+        nonlocal last_update_ts
+        offset, length = ranges[index]
+        # httplib2 connections are not thread-safe, so every worker builds its own service.
+        service = build('drive', 'v3', credentials=credentials)
+        part_metadata = {
+            'name': f"{file_name}.part{index:02d}",
+            'parents': [folder_id]
+        }
+        try:
+            with FileSlice(file_path, offset, length) as part:
+                media = MediaIoBaseUpload(part, mimetype='application/octet-stream', resumable=True,
+                                          chunksize=chunk_size_mib * 1024 * 1024)
+                request = service.files().create(body=part_metadata, media_body=media, fields='id')
+                response = None
+                while response is None:
+                    if cancelled.is_set():
+                        return None
+                    status, response = request.next_chunk(num_retries=MAX_RETRIES)
+                    if status:
+                        with progress_lock:
+                            progress[index] = status.resumable_progress
+                            last_update_ts = print_progress_bar(
+                                sum(progress), file_size, start_time, last_update_ts, prefix="Uploading"
+                            )
+                with progress_lock:
+                    created_ids.append(response['id'])
+                    progress[index] = length
+                sha256 = part.sha256() or sha256_of_range(file_path, offset, length)
+        except BaseException:
+            cancelled.set()
+            raise
+        return {
+            'name': part_metadata['name'],
+            'id': response['id'],
+            'offset': offset,
+            'size': length,
+            'sha256': sha256,
+        }
+
+    print(f"Uploading '{file_name}' to Google Drive in {len(ranges)} parallel parts...")
+    try:
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            try:
+                parts = list(executor.map(upload_part, range(len(ranges))))
+            except BaseException:
+                cancelled.set() # Also covers Ctrl+C in this thread
+                raise
+    except BaseException:
+        delete_drive_files(build('drive', 'v3', credentials=credentials), created_ids)
+        raise
+
+    sys.stdout.write("\r✅ Upload complete!          \n") # Clear the line and print final message
+    sys.stdout.flush()
+
+    manifest = {
+        'archive': file_name,
+        'size': file_size,
+        'parts': parts,
+    }
+    service = build('drive', 'v3', credentials=credentials)
+    manifest_metadata = {
+        'name': f"{file_name}{MANIFEST_SUFFIX}",
+        'parents': [folder_id],
+        # Lets restore.py show the archive size without downloading the manifest.
+        'appProperties': {**(app_properties or {}), 'archive_size': str(file_size)}
+    }
+    media = MediaIoBaseUpload(io.BytesIO(json.dumps(manifest, indent=4).encode()), mimetype='application/json')
+    response = service.files().create(
+        body=manifest_metadata,
+        media_body=media,
+        fields='id, webViewLink'
+    ).execute(num_retries=MAX_RETRIES)
+    print(" Manifest web view link:", response.get("webViewLink"))
+    return response.get("webViewLink")
+
+def upload_archive(credentials, service, file_path, folder_id, chunk_size_mib=DEFAULT_CHUNK_SIZE_MIB, app_properties=None):
+    """Uploads an archive in parallel parts if it is large, otherwise as a single file."""
+    if os.path.getsize(file_path) > UPLOAD_PART_SIZE:
+        return upload_parts_to_drive(credentials, file_path, folder_id, chunk_size_mib, app_properties)
+    return upload_to_drive(service, file_path, folder_id, chunk_size_mib, app_properties)
+
+def resolve_drive(drive_future):
+    """Returns the background connect_drive result, falling back to an interactive connect_drive()."""
+    if drive_future:
+        try:
+            drive = drive_future.result()
+            if drive:
+                return drive
+        except Exception as e:
+            print(f"Background Google Drive setup failed ({e}). Retrying...")
+    return connect_drive()
+
+def format_bytes(bytes_val):
+    """Formats a byte count as a short human-readable size (e.g. '512KB', '1.5GB')."""
+    if bytes_val is None:
+        return "N/A"
+    bytes_val = float(bytes_val)
+    if bytes_val >= _GB:
+        return f"{bytes_val / _GB:.1f}GB"
+    elif bytes_val >= _MB:
+        return f"{bytes_val / _MB:.0f}MB"
+    elif bytes_val >= _KB:
+        return f"{bytes_val / _KB:.0f}KB"
+    else:
+        return f"{bytes_val:.0f}B"
+
+def print_progress_bar(current_bytes, total_bytes, start_time, last_update_ts, prefix="Transferring"):
     """
     Prints a dynamic CLI progress bar for file transfers.
 
+    Redraws at most once every PROGRESS_INTERVAL seconds (plus once at 100%), so calling it
+    on every transferred chunk costs almost nothing between redraws.
+
     Args:
         current_bytes (int): The number of bytes transferred so far.
         total_bytes (int): The total size of the file in bytes.
         start_time (float): The timestamp (time.time()) when the transfer started.
-        last_printed_percentage (int): The last percentage (multiple of 5) that was printed.
-                                       Pass -1 initially to print the 0% bar.
+        last_update_ts (float): The time.monotonic() of the last redraw, as returned by the
+                                previous call. Pass 0 initially to draw the first update.
         prefix (str): The prefix for the progress bar (e.g., "Uploading", "Downloading").
 
     Returns:
-        int: The updated last_printed_percentage.
+        float: The updated last_update_ts.
     """
+    now = time.monotonic()
+    if now - last_update_ts < PROGRESS_INTERVAL and current_bytes != total_bytes:
+        return last_update_ts
     if total_bytes == 0: # Avoid division by zero
-        return last_printed_percentage
+        return last_update_ts
 
     progress_percent = int((current_bytes / total_bytes) * 100)
 
-    # Only update on every 5% increment or if it's the very first update (0%)
-    # This also ensures we don't print the same percentage multiple times if it stays at a multiple of 5
-    if progress_percent % 5 == 0 and progress_percent >= last_printed_percentage:
-        if progress_percent == last_printed_percentage and progress_percent != 0:
-            return last_printed_percentage
-        
-        # Calculate speeds and ETA
-        elapsed_time = time.time() - start_time
-        if current_bytes > 0 and elapsed_time > 0:
-            speed_bps = current_bytes / elapsed_time
-            remaining_bytes = total_bytes - current_bytes
-            eta_seconds = remaining_bytes / speed_bps
-        else:
-            eta_seconds = 0
+    # Calculate speeds and ETA
+    elapsed_time = time.time() - start_time
+    if current_bytes > 0 and elapsed_time > 0:
+        speed_bps = current_bytes / elapsed_time
+        remaining_bytes = total_bytes - current_bytes
+        eta_seconds = remaining_bytes / speed_bps
+    else:
+        eta_seconds = 0
 
-        # Format ETA
-        if eta_seconds < 60:
-            eta_str = f"{int(eta_seconds)}s left"
-        else:
-            eta_minutes = int(eta_seconds / 60)
-            eta_str = f"{eta_minutes}m {int(eta_seconds % 60)}s left"
-
-        # Convert to MB/GB
-        def format_bytes(bytes_val):
-            if bytes_val is None:
-                return "N/A"
-            bytes_val = float(bytes_val)
-            if bytes_val >= (1024**3):
-                return f"{bytes_val / (1024**3):.1f}GB"
-            elif bytes_val >= (1024**2):
-                return f"{bytes_val / (1024**2):.0f}MB"
-            elif bytes_val >= 1024:
-                return f"{bytes_val / 1024:.0f}KB"
-            else:
-                return f"{bytes_val:.0f}B"
-
-        current_size_str = format_bytes(current_bytes)
-        total_size_str = format_bytes(total_bytes)
-
-        # Progress bar
-        bar_length = 20
-        filled_blocks = int(bar_length * progress_percent / 100)
-        empty_blocks = bar_length - filled_blocks
-        bar = '█' * filled_blocks + '░' * empty_blocks
-
-        # Construct the output string
-        output_str = (
-            f"{prefix}: {bar} {progress_percent}% "
-            f"({current_size_str} / {total_size_str}) | ⏱️ {eta_str}"
-        )
-        sys.stdout.write(f"\r{output_str}")
-        sys.stdout.flush()
-        return progress_percent
-    return last_printed_percentage
+    # Format ETA
+    if eta_seconds < 60:
+        eta_str = f"{int(eta_seconds)}s left"
+    else:
+        eta_minutes = int(eta_seconds / 60)
+        eta_str = f"{eta_minutes}m {int(eta_seconds % 60)}s left"
+
+    current_size_str = format_bytes(current_bytes)
+    total_size_str = format_bytes(total_bytes)
+
+    # Progress bar
+    bar = _BARS[progress_percent * BAR_LENGTH // 100]
+
+    # Construct the output string
+    output_str = (
+        f"{prefix}: {bar} {progress_percent}% "
+        f"({current_size_str} / {total_size_str}) | {_ETA_LABEL} {eta_str}"
+    )
+    sys.stdout.write(f"\r{output_str}")
+    sys.stdout.flush()
+    return now
 
 def cleanup_all_7z_files(directory, dry_run=False):
     """Deletes all .7z files in the specified directory."""
@@ -287,16 +613,20 @@ def cleanup_all_7z_files(directory, dry_run=False):
     print(f"\n--- Starting 7z file cleanup in: {target_path} ---")
     archive_files_found = False
 
-    for archive_file in target_path.glob('*.7z'):
-        archive_files_found = True
-        if dry_run:
-            print(f"[Dry Run] Would delete: {archive_file}")
-        else:
-            try:
-                os.remove(archive_file)
-                print(f"🗑️ Deleted: {archive_file}")
-            except OSError as e:
-                print(f"❌ Failed to delete {archive_file}: {e}")
+    # scandir yields names and cached file types in one pass, without building a Path per entry.
+    with os.scandir(target_path) as entries:
+        for entry in entries:
+            if not entry.name.endswith('.7z') or not entry.is_file(follow_symlinks=False):
+                continue
+            archive_files_found = True
+            if dry_run:
+                print(f"[Dry Run] Would delete: {entry.path}")
+            else:
+                try:
+                    os.unlink(entry.path)
+                    print(f"🗑️ Deleted: {entry.path}")
+                except OSError as e:
+                    print(f"❌ Failed to delete {entry.path}: {e}")
     
     if not archive_files_found:
         print("✅ No .7z files found.")
@@ -305,17 +635,39 @@ def cleanup_all_7z_files(directory, dry_run=False):
     else:
         print("\nCleanup complete.")
 
+def positive_int(value):
+    """argparse type for counts and sizes that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {number}")
+    return number
+
 def main():
     parser = argparse.ArgumentParser(description="Backup a folder and upload to Google Drive.")
     parser.add_argument("source_dir", help="The source directory to backup (e.g., /storage/emulated/0/MyFiles)")
     parser.add_argument("--destination_dir", default=str(Path.cwd()), 
                         help="The directory to store the local backup file (default: current working directory)")
+    parser.add_argument("--level", type=int, choices=range(10), default=DEFAULT_COMPRESSION_LEVEL, metavar="0-9",
+                        help="7z compression level (default: %(default)s). Higher levels are much slower for "
+                             "little gain on photos/videos; use 9 only for text-heavy folders")
+    parser.add_argument("--threads", type=positive_int, default=None,
+                        help="Number of 7z compression threads (default: all CPU cores). Lower it to leave "
+                             "CPU for other apps or when the source disk, not the CPU, is the bottleneck")
+    parser.add_argument("--chunk-size-mib", type=positive_int, default=DEFAULT_CHUNK_SIZE_MIB,
+                        help="Google Drive upload chunk size in MiB (default: %(default)s). Larger chunks mean "
+                             "fewer HTTP round-trips; smaller chunks lose less progress on flaky connections")
     parser.add_argument("--cleanup", action="store_true", 
                         help="Delete the local .7z file after successful upload to Google Drive")
     parser.add_argument("--clean-all-zips", action="store_true", 
                         help="Delete all .7z files in the destination directory after backup/upload")
     parser.add_argument("--dry-run-cleanup", action="store_true", 
                         help="Perform a dry run for --clean-all-zips (simulate deletion)")
+    parser.add_argument("--skip-unchanged", action="store_true",
+                        help="Skip compression and upload if Google Drive already holds a backup of identical "
+                             "source contents (compares file paths, sizes and modification times)")
     
     args = parser.parse_args()
 
@@ -323,41 +675,61 @@ def main():
     timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
     backup_name = f"backup_{label}_{timestamp}"
     
+    # Authenticate and look up the Drive folder while 7z compresses, so the network round-trips
+    # overlap with compression. Only done with a saved token, so that an interactive login never
+    # interleaves with the 7z progress output.
+    drive_executor = ThreadPoolExecutor(max_workers=1)
+    drive_future = drive_executor.submit(connect_drive, False) if os.path.exists(TOKEN_FILE) else None
+    drive_executor.shutdown(wait=False)
+
+    drive = None
+    drive_attempted = False # A failed connect is not repeated, so the user isn't asked to log in twice
+    app_properties = None
+    if args.skip_unchanged and os.path.isdir(args.source_dir):
+        try:
+            fingerprint = source_fingerprint(args.source_dir)
+            app_properties = {'source_sha256': fingerprint}
+            drive_attempted = True
+            drive = resolve_drive(drive_future)
+            existing = drive and find_backup_by_fingerprint(drive[1], drive[2], fingerprint)
+        except Exception as e:
+            print(f"Could not check Google Drive for an unchanged backup: {e}")
+            existing = None
+        if existing:
+            print(f"Source is unchanged since '{existing['name']}'. Skipping backup.")
+            print(" Web view link:", existing.get("webViewLink"))
+            if args.clean_all_zips:
+                cleanup_all_7z_files(args.destination_dir, args.dry_run_cleanup)
+            return
+
     # Part 1: Create Backup
-    archive_file_path = create_backup(args.source_dir, args.destination_dir, backup_name, COMPRESSION_PASSWORD)
+    archive_file_path = create_backup(args.source_dir, args.destination_dir, backup_name, COMPRESSION_PASSWORD, args.level, args.threads)
     if not archive_file_path:
         return
 
     # Part 3: Google Drive Upload
     print("\n--- Starting Google Drive Upload ---")
     try:
-        credentials = authenticate_google_drive()
-        if credentials:
-            service = build('drive', 'v3', credentials=credentials)
-
-            print(f"Searching for '{DRIVE_FOLDER_NAME}' folder in Google Drive...")
-            results = service.files().list(
-                q=f"name='{DRIVE_FOLDER_NAME}' and mimeType='application/vnd.google-apps.folder'",
-                spaces='drive',
-                fields='files(id, name)'
-            ).execute()
-            
-            items = results.get('files', [])
-            folder_id = None
-            if not items:
-                print(f"'{DRIVE_FOLDER_NAME}' folder not found. Creating it...")
-                file_metadata = {
-                    'name': DRIVE_FOLDER_NAME,
-                    'mimeType': 'application/vnd.google-apps.folder'
-                }
-                folder = service.files().create(body=file_metadata, fields='id').execute()
-                folder_id = folder.get('id')
-                print(f"'{DRIVE_FOLDER_NAME}' folder created with ID: {folder_id}")
-            else:
-                folder_id = items[0]['id']
-                print(f"Found '{DRIVE_FOLDER_NAME}' folder with ID: {folder_id}")
+        from googleapiclient.errors import HttpError
 
-            upload_link = upload_to_drive(service, archive_file_path, folder_id)
+        if not drive_attempted:
+            drive = resolve_drive(drive_future)
+        if drive:
+            credentials, service, folder_id = drive
+            print(f"Using '{DRIVE_FOLDER_NAME}' folder with ID: {folder_id}")
+
+            try:
+                upload_link = upload_archive(credentials, service, archive_file_path, folder_id,
+                                             args.chunk_size_mib, app_properties)
+            except HttpError as e:
+                if e.resp.status != 404:
+                    raise
+                # The cached folder was moved or deleted; look it up again and retry once.
+                print(f"\n'{DRIVE_FOLDER_NAME}' folder {folder_id} not found. Looking it up again...")
+                invalidate_cached_folder_id()
+                folder_id = get_drive_folder_id(service, use_cache=False)
+                upload_link = upload_archive(credentials, service, archive_file_path, folder_id,
+                                             args.chunk_size_mib, app_properties)
             if upload_link and args.cleanup:
                 # Part 4: Optional Cleanup (just the newly created 7z)
                 print(f"Deleting local backup file: {archive_file_path}")
@@ -1,35 +1,78 @@
 import os
-import json # Still needed for potential future use or if other parts of the system rely on it
+import errno
+import json
 import argparse
 from datetime import datetime
 from pathlib import Path
 import time
 import subprocess
-import pickle
-
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-import io
+import shutil
+import tempfile
+import fnmatch
 import re
 import sys
+import hashlib
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # --- CONFIGURATION ---
 SCOPES = ['https://www.googleapis.com/auth/drive.file', 'https://www.googleapis.com/auth/drive.readonly']
 CREDENTIALS_FILE = 'credentials.json'
-TOKEN_FILE = 'token.pkl'
+# Kept apart from backup.py's token.json, which is only granted the narrower drive.file scope.
+TOKEN_FILE = 'restore_token.json'
 DRIVE_FOLDER_NAME = 'Backups'
+# Folder ID cache written by backup.py (see FOLDER_ID_CACHE there).
+FOLDER_ID_CACHE = 'drive_folder.json'
+FOLDER_ID_CACHE_TTL = 7 * 86400 # seconds
 
 # IMPORTANT: Set the same strong password used for 7z archive encryption in backup.py.
 COMPRESSION_PASSWORD = "YourSecure7zPasswordHere"
 
+# Large backups are uploaded by backup.py as several '<archive>.partNN' files plus a
+# '<archive>.manifest.json' describing how to join them.
+MANIFEST_SUFFIX = '.manifest.json'
+
+# Download chunk size. MediaIoBaseDownload defaults to 100 KiB, i.e. one HTTP range request
+# (and round-trip) per 100 KiB of archive.
+DEFAULT_CHUNK_SIZE_MIB = 64
+
+# Archives are fetched as concurrent HTTP range requests over this many connections.
+DEFAULT_CONNECTIONS = 8
+DRIVE_MEDIA_URL = 'https://www.googleapis.com/drive/v3/files/{file_id}?alt=media'
+# Rate limits and transient server errors are retried with exponential backoff: by
+# googleapiclient's num_retries for API calls, and by download_ranges for media downloads.
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 6
+
+# Minimum time between progress bar redraws, in seconds.
+PROGRESS_INTERVAL = 0.25
+# Progress bar width, with every fill level rendered once up front. Logs and pipes get plain
+# ASCII instead of block characters and emoji.
+BAR_LENGTH = 20
+_TTY = sys.stdout.isatty()
+_BAR_FILL, _BAR_EMPTY, _ETA_LABEL = ('█', '░', '⏱️') if _TTY else ('#', '-', 'ETA')
+_BARS = tuple(_BAR_FILL * i + _BAR_EMPTY * (BAR_LENGTH - i) for i in range(BAR_LENGTH + 1))
+_KB, _MB, _GB = 1024, 1024**2, 1024**3
+
+# Matches the version in the banner printed by a bare `7z`, e.g. "7-Zip [64] 16.02" or "7-Zip (a) 23.01".
+SEVENZIP_VERSION_RE = re.compile(r"7-Zip.*?(\d+)\.(\d+)")
+
+# Downloaded archives are staged on tmpfs (RAM) when it has room for them: the archive is
+# deleted right after extraction, so writing it to flash storage first is wasted I/O.
+TMPFS_STAGING_DIR = '/dev/shm'
+TMPFS_HEADROOM = 1.2
+
 def authenticate_google_drive():
     """Authenticates with Google Drive API."""
+    # The Google libraries take a while to import, so only Drive restores pay for them.
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
     creds = None
     if os.path.exists(TOKEN_FILE):
-        with open(TOKEN_FILE, 'rb') as token:
-            creds = pickle.load(token)
+        creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
             creds.refresh(Request())
@@ -37,138 +80,296 @@ def authenticate_google_drive():
             flow = InstalledAppFlow.from_client_secrets_file(
                 CREDENTIALS_FILE, SCOPES)
             creds = flow.run_local_server(port=0, open_browser=False, success_message='Authentication complete. You can close this tab.')
-        with open(TOKEN_FILE, 'wb') as token:
-            pickle.dump(creds, token)
+        Path(TOKEN_FILE).write_text(creds.to_json())
     return creds
 
-def list_drive_backups(credentials, drive_folder_name):
-    """Lists .7z backup files in the specified Google Drive folder."""
+def create_drive_session(credentials, connections=DEFAULT_CONNECTIONS):
+    """Returns an AuthorizedSession whose connection pool can serve `connections` parallel downloads."""
+    import requests
+    from google.auth.transport.requests import AuthorizedSession
+
+    session = AuthorizedSession(credentials)
+    adapter = requests.adapters.HTTPAdapter(pool_connections=connections, pool_maxsize=connections)
+    session.mount('https://', adapter)
+    return session
+
+def list_all_files(service, **list_kwargs):
+    """Runs a files().list query and follows nextPageToken until every page has been fetched."""
+    files = []
+    page_token = None
+    while True:
+        results = service.files().list(pageToken=page_token, **list_kwargs).execute(num_retries=MAX_RETRIES)
+        files.extend(results.get('files', []))
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            return files
+
+def load_cached_folder_id(drive_folder_name):
+    """Returns the folder ID cached by backup.py for drive_folder_name, or None if there is no fresh cache."""
     try:
-        service = build('drive', 'v3', credentials=credentials)
-
-        # Find the 'Backups' folder ID
-        results = service.files().list(
-            q=f"name='{drive_folder_name}' and mimeType='application/vnd.google-apps.folder'",
-            spaces='drive',
-            fields='files(id)'
-        ).execute()
-        
-        items = results.get('files', [])
-        if not items:
-            print(f"Error: '{drive_folder_name}' folder not found in Google Drive.")
-            return []
-        folder_id = items[0]['id']
+        if time.time() - os.path.getmtime(FOLDER_ID_CACHE) >= FOLDER_ID_CACHE_TTL:
+            return None
+        with open(FOLDER_ID_CACHE, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cache.get('name') != drive_folder_name:
+        return None
+    return cache.get('folder_id')
+
+def lookup_drive_folder_id(service, drive_folder_name):
+    """Returns the ID of the drive_folder_name folder on Google Drive, or None if it doesn't exist."""
+    results = service.files().list(
+        q=f"name='{drive_folder_name}' and mimeType='application/vnd.google-apps.folder'",
+        spaces='drive',
+        fields='files(id)'
+    ).execute(num_retries=MAX_RETRIES)
+
+    items = results.get('files', [])
+    return items[0]['id'] if items else None
+
+def list_backup_files(service, folder_id):
+    """Returns the .7z files and JSON manifests in a Drive folder, newest first."""
+    # Drive returns at most one page per call (100 files by default), so page through the
+    # listing and let the server do the newest-first ordering.
+    return list_all_files(
+        service,
+        q=f"'{folder_id}' in parents and (mimeType='application/x-7z-compressed' or mimeType='application/json')",
+        spaces='drive',
+        pageSize=1000,
+        orderBy='modifiedTime desc',
+        fields='nextPageToken, files(id, name, mimeType, size, md5Checksum, modifiedTime, appProperties)'
+    )
+
+def list_drive_backups(service, drive_folder_name):
+    """Lists .7z backup files in the specified Google Drive folder."""
+    from googleapiclient.errors import HttpError
 
-        # List .7z files within the 'Backups' folder
+    try:
         print(f"Listing .7z files in '{drive_folder_name}'...")
-        results = service.files().list(
-            q=f"'{folder_id}' in parents and mimeType='application/x-7z-compressed'",
-            spaces='drive',
-            fields='files(id, name, size, modifiedTime)'
-        ).execute()
+        files = []
+        # backup.py caches the 'Backups' folder ID, which saves the folder lookup round trip.
+        folder_id = load_cached_folder_id(drive_folder_name)
+        if folder_id:
+            try:
+                files = list_backup_files(service, folder_id)
+            except HttpError as e:
+                if e.resp.status != 404:
+                    raise
+
+        if not files:
+            # No cache, or it points at a folder that was deleted or emptied: look the folder up.
+            folder_id = lookup_drive_folder_id(service, drive_folder_name)
+            if not folder_id:
+                print(f"Error: '{drive_folder_name}' folder not found in Google Drive.")
+                return []
+            files = list_backup_files(service, folder_id)
         
-        backups = results.get('files', [])
-        return sorted(backups, key=lambda x: x['modifiedTime'], reverse=True)
+        backups = []
+        for b in files:
+            if b['name'].endswith(MANIFEST_SUFFIX):
+                # Present a multi-part backup as the archive it reassembles into.
+                b['manifest'] = True
+                b['name'] = b['name'][:-len(MANIFEST_SUFFIX)]
+                b['size'] = b.get('appProperties', {}).get('archive_size', 0)
+            elif b['mimeType'] == 'application/json':
+                continue # Some other JSON file, not a backup
+            # Parsed once here so the menu and the download code don't re-parse Drive's strings.
+            # Drive timestamps always end in 'Z', which fromisoformat() only accepts from 3.11 on.
+            b['_mtime'] = datetime.fromisoformat(b['modifiedTime'][:-1] + '+00:00')
+            b['_size_bytes'] = int(b.get('size') or 0)
+            backups.append(b)
+        return backups
 
     except Exception as e:
         print(f"An error occurred while listing Drive backups: {e}")
         return []
 
-def print_progress_bar(current_bytes, total_bytes, start_time, last_printed_percentage, prefix="Transferring"):
+def format_bytes(bytes_val):
+    """Formats a byte count as a short human-readable size (e.g. '512KB', '1.5GB')."""
+    if bytes_val is None:
+        return "N/A"
+    bytes_val = float(bytes_val)
+    if bytes_val >= _GB:
+        return f"{bytes_val / _GB:.1f}GB"
+    elif bytes_val >= _MB:
+        return f"{bytes_val / _MB:.0f}MB"
+    elif bytes_val >= _KB:
+        return f"{bytes_val / _KB:.0f}KB"
+    else:
+        return f"{bytes_val:.0f}B"
+
+def print_progress_bar(current_bytes, total_bytes, start_time, last_update_ts, prefix="Transferring"):
     """
     Prints a dynamic CLI progress bar for file transfers.
 
+    Redraws at most once every PROGRESS_INTERVAL seconds (plus once at 100%), so calling it
+    on every transferred chunk costs almost nothing between redraws.
+
     Args:
         current_bytes (int): The number of bytes transferred so far.
         total_bytes (int): The total size of the file in bytes.
         start_time (float): The timestamp (time.time()) when the transfer started.
-        last_printed_percentage (int): The last percentage (multiple of 5) that was printed.
-                                       Pass -1 initially to print the 0% bar.
+        last_update_ts (float): The time.monotonic() of the last redraw, as returned by the
+                                previous call. Pass 0 initially to draw the first update.
         prefix (str): The prefix for the progress bar (e.g., "Uploading", "Downloading").
 
     Returns:
-        int: The updated last_printed_percentage.
+        float: The updated last_update_ts.
     """
+    now = time.monotonic()
+    if now - last_update_ts < PROGRESS_INTERVAL and current_bytes != total_bytes:
+        return last_update_ts
     if total_bytes == 0: # Avoid division by zero
-        return last_printed_percentage
+        return last_update_ts
 
     progress_percent = int((current_bytes / total_bytes) * 100)
 
-    # Only update on every 5% increment or if it's the very first update (0%)
-    # This also ensures we don't print the same percentage multiple times if it stays at a multiple of 5
-    if progress_percent % 5 == 0 and progress_percent >= last_printed_percentage:
-        if progress_percent == last_printed_percentage and progress_percent != 0:
-            return last_printed_percentage
-        
-        # Calculate speeds and ETA
-        elapsed_time = time.time() - start_time
-        if current_bytes > 0 and elapsed_time > 0:
-            speed_bps = current_bytes / elapsed_time
-            remaining_bytes = total_bytes - current_bytes
-            eta_seconds = remaining_bytes / speed_bps
-        else:
-            eta_seconds = 0
+    # Calculate speeds and ETA
+    elapsed_time = time.time() - start_time
+    if current_bytes > 0 and elapsed_time > 0:
+        speed_bps = current_bytes / elapsed_time
+        remaining_bytes = total_bytes - current_bytes
+        eta_seconds = remaining_bytes / speed_bps
+    else:
+        eta_seconds = 0
 
-        # Format ETA
-        if eta_seconds < 60:
-            eta_str = f"{int(eta_seconds)}s left"
-        else:
-            eta_minutes = int(eta_seconds / 60)
-            eta_str = f"{eta_minutes}m {int(eta_seconds % 60)}s left"
-
-        # Convert to MB/GB
-        def format_bytes(bytes_val):
-            if bytes_val is None:
-                return "N/A"
-            bytes_val = float(bytes_val)
-            if bytes_val >= (1024**3):
-                return f"{bytes_val / (1024**3):.1f}GB"
-            elif bytes_val >= (1024**2):
-                return f"{bytes_val / (1024**2):.0f}MB"
-            elif bytes_val >= 1024:
-                return f"{bytes_val / 1024:.0f}KB"
-            else:
-                return f"{bytes_val:.0f}B"
-
-        current_size_str = format_bytes(current_bytes)
-        total_size_str = format_bytes(total_bytes)
-
-        # Progress bar
-        bar_length = 20
-        filled_blocks = int(bar_length * progress_percent / 100)
-        empty_blocks = bar_length - filled_blocks
-        bar = '█' * filled_blocks + '░' * empty_blocks
-
-        # Construct the output string
-        output_str = (
-            f"{prefix}: {bar} {progress_percent}% "
-            f"({current_size_str} / {total_size_str}) | ⏱️ {eta_str}"
-        )
-        sys.stdout.write(f"\r{output_str}")
-        sys.stdout.flush()
-        return progress_percent
-    return last_printed_percentage
+    # Format ETA
+    if eta_seconds < 60:
+        eta_str = f"{int(eta_seconds)}s left"
+    else:
+        eta_minutes = int(eta_seconds / 60)
+        eta_str = f"{eta_minutes}m {int(eta_seconds % 60)}s left"
+
+    current_size_str = format_bytes(current_bytes)
+    total_size_str = format_bytes(total_bytes)
+
+    # Progress bar
+    bar = _BARS[progress_percent * BAR_LENGTH // 100]
+
+    # Construct the output string
+    output_str = (
+        f"{prefix}: {bar} {progress_percent}% "
+        f"({current_size_str} / {total_size_str}) | {_ETA_LABEL} {eta_str}"
+    )
+    sys.stdout.write(f"\r{output_str}")
+    sys.stdout.flush()
+    return now
+
+def write_all(fd, data, offset):
+    """os.pwrite until every byte of data has landed at offset."""
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+def is_retryable_response(response):
+    """True for rate limits (429, or 403 with a *RateLimitExceeded reason) and transient 5xx errors."""
+    if response.status_code == 403:
+        return 'RateLimitExceeded' in response.text or 'rateLimitExceeded' in response.text
+    return response.status_code in RETRYABLE_STATUS_CODES
+
+def download_ranges(session, sources, destination_path, total_size,
+                    chunk_size_mib=DEFAULT_CHUNK_SIZE_MIB, connections=DEFAULT_CONNECTIONS, prefix="Downloading",
+                    already_downloaded=0):
+    """
+    Downloads Drive files into one local file using concurrent HTTP range requests.
+
+    sources is a list of (file_id, destination_offset, size). Each source is split into
+    chunk_size_mib ranges which are fetched by up to `connections` threads and written straight
+    to their final offset with os.pwrite (or, where that is missing, through a file handle of
+    their own), so ranges can complete in any order.
 
-def download_file_from_drive(file_id, file_name, destination_path, credentials, file_size):
+    With already_downloaded > 0 the existing destination file is updated in place instead of
+    truncated, and those bytes count as done in the progress bar.
+    """
+    import requests
+
+    chunk_size = chunk_size_mib * 1024 * 1024
+    tasks = [
+        (file_id, src_offset, dest_offset + src_offset, min(chunk_size, size - src_offset))
+        for file_id, dest_offset, size in sources
+        for src_offset in range(0, size, chunk_size)
+    ]
+
+    progress_lock = threading.Lock()
+    downloaded_bytes = already_downloaded
+    start_time = time.time()
+    last_update_ts = 0 # Initialize for print_progress_bar
+
+    def add_progress(num_bytes):
+        nonlocal downloaded_bytes, last_update_ts
+        with progress_lock:
+            downloaded_bytes += num_bytes
+            last_update_ts = print_progress_bar(
+                downloaded_bytes, total_size, start_time, last_update_ts, prefix=prefix
+            )
+
+    def fetch_range(task):
+        if hasattr(os, 'pwrite'):
+            return fetch_range_to(task, lambda data, offset: write_all(fd, data, offset))
+        # No pwrite on Windows: each range seeks and writes through its own handle so the
+        # threads never move each other's file position.
+        with open(destination_path, 'r+b') as f:
+            def write_at(data, offset):
+                f.seek(offset)
+                f.write(data)
+            return fetch_range_to(task, write_at)
+
+    def fetch_range_to(task, write_at):
+        file_id, src_offset, dest_offset, length = task
+        url = DRIVE_MEDIA_URL.format(file_id=file_id)
+        done = 0
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                # Resume a retried range from the last byte that made it to disk.
+                headers = {'Range': f"bytes={src_offset + done}-{src_offset + length - 1}"}
+                with session.get(url, headers=headers, stream=True, timeout=60) as response:
+                    if is_retryable_response(response):
+                        raise requests.HTTPError(f"HTTP {response.status_code}", response=response)
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        raise RuntimeError(f"Drive ignored the range request (HTTP {response.status_code})")
+                    for data in response.iter_content(chunk_size=1024 * 1024):
+                        write_at(data, dest_offset + done)
+                        done += len(data)
+                        add_progress(len(data))
+                if done != length:
+                    raise requests.ConnectionError(f"range ended after {done} of {length} bytes")
+                return
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError,
+                    requests.HTTPError) as e:
+                if attempt == MAX_RETRIES or (e.response is not None and not is_retryable_response(e.response)):
+                    raise
+                time.sleep(2 ** attempt + random.random())
+
+    flags = os.O_WRONLY | os.O_CREAT | (0 if already_downloaded else os.O_TRUNC) | getattr(os, 'O_BINARY', 0)
+    fd = os.open(destination_path, flags, 0o644)
+    try:
+        if total_size > 0 and hasattr(os, 'posix_fallocate'):
+            # Reserve the whole file up front: fails fast when the disk is too small and
+            # avoids fragmenting the file as out-of-order ranges arrive.
+            try:
+                os.posix_fallocate(fd, 0, total_size)
+            except OSError as e:
+                # Bionic and musl report EOPNOTSUPP/EINVAL on filesystems without fallocate
+                # (exFAT, FUSE, network mounts) instead of emulating it; just skip preallocation.
+                if e.errno == errno.ENOSPC:
+                    raise
+        with ThreadPoolExecutor(max_workers=max(1, min(connections, len(tasks)))) as executor:
+            # list() re-raises the first failed range after the others finish.
+            list(executor.map(fetch_range, tasks))
+    finally:
+        os.close(fd)
+
+def download_file_from_drive(session, file_id, file_name, destination_path, file_size,
+                             chunk_size_mib=DEFAULT_CHUNK_SIZE_MIB, connections=DEFAULT_CONNECTIONS):
     """Downloads a file from Google Drive."""
     try:
-        service = build('drive', 'v3', credentials=credentials)
-        request = service.files().get_media(fileId=file_id)
-        fh = io.FileIO(destination_path, 'wb')
-        downloader = MediaIoBaseDownload(fh, request)
-        done = False
         print(f"Downloading '{file_name}'...")
-        start_time = time.time()
-        downloaded_bytes = 0
-        last_printed_percentage = -1 # Initialize for print_progress_bar
-
-        while done is False:
-            status, done = downloader.next_chunk()
-            if status:
-                downloaded_bytes = status.resumable_progress
-                last_printed_percentage = print_progress_bar(
-                    downloaded_bytes, file_size, start_time, last_printed_percentage, prefix="Downloading"
-                )
+        download_ranges(session, [(file_id, 0, file_size)], destination_path, file_size,
+                        chunk_size_mib, connections)
 
         sys.stdout.write("\r✅ Download complete!          \n") # Clear the line and print final message
         sys.stdout.flush()
@@ -178,10 +379,135 @@ def download_file_from_drive(file_id, file_name, destination_path, credentials,
         print(f"Error downloading file '{file_name}': {e}")
         return False
 
-    
+def sha256_of_range(path, offset, length, block_size=8 * 1024 * 1024):
+    """Returns the hex sha256 of `length` bytes of a file starting at `offset`."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        if hasattr(os, 'posix_fadvise'):
+            # Each part is hashed front to back; let the kernel read ahead aggressively.
+            os.posix_fadvise(f.fileno(), offset, length, os.POSIX_FADV_SEQUENTIAL)
+        f.seek(offset)
+        while length > 0:
+            block = f.read(min(block_size, length))
+            if not block:
+                break
+            digest.update(block)
+            length -= len(block)
+    return digest.hexdigest()
+
+def md5_of_file(path, block_size=8 * 1024 * 1024):
+    """Returns the hex md5 of a whole file, for comparison with Drive's md5Checksum."""
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        while block := f.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+def is_local_copy_valid(path, backup):
+    """Returns True if path holds exactly the single-file Drive backup described by `backup`."""
+    if not path.exists() or path.stat().st_size != backup['_size_bytes']:
+        return False
+    # Downloads are preallocated, so an interrupted one already has the full size: only the
+    # checksum tells a complete copy apart.
+    return 'md5Checksum' in backup and md5_of_file(path) == backup['md5Checksum']
 
-def restore_backup(archive_file_path, target_dir, password):
-    """Restores a backup from a .7z file to the target directory."""
+def download_parts_from_drive(service, session, manifest_id, destination_path,
+                              chunk_size_mib=DEFAULT_CHUNK_SIZE_MIB, connections=DEFAULT_CONNECTIONS, resume=False):
+    """
+    Downloads a multi-part backup uploaded by backup.py.
+
+    Fetches the manifest, downloads every part straight to its offset in destination_path
+    and verifies each part against the sha256 recorded in the manifest. With resume=True,
+    parts of an existing destination_path that already match their checksum are kept.
+    """
+    try:
+        manifest = json.loads(service.files().get_media(fileId=manifest_id).execute(num_retries=MAX_RETRIES))
+        parts = manifest['parts']
+
+        already_downloaded = 0
+        if resume and os.path.exists(destination_path) and os.path.getsize(destination_path) == manifest['size']:
+            print(f"Checking the local copy of '{manifest['archive']}'...")
+            missing = [p for p in parts if sha256_of_range(destination_path, p['offset'], p['size']) != p['sha256']]
+            if not missing:
+                print(f" Local copy verified, skipping download: {destination_path}")
+                return True
+            already_downloaded = manifest['size'] - sum(p['size'] for p in missing)
+            print(f"Resuming: {len(parts) - len(missing)} of {len(parts)} parts are already downloaded.")
+            parts = missing
+
+        print(f"Downloading {len(parts)} parts of '{manifest['archive']}'...")
+        download_ranges(session, [(p['id'], p['offset'], p['size']) for p in parts],
+                        destination_path, manifest['size'], chunk_size_mib, connections,
+                        already_downloaded=already_downloaded)
+        sys.stdout.write("\r✅ Download complete!          \n") # Clear the line and print final message
+        sys.stdout.flush()
+
+        for part in parts:
+            if sha256_of_range(destination_path, part['offset'], part['size']) != part['sha256']:
+                print(f"Error: checksum mismatch for part '{part['name']}'.")
+                return False
+        print(f" Downloaded and verified: {destination_path}")
+        return True
+    except Exception as e:
+        print(f"Error downloading multi-part backup: {e}")
+        return False
+
+def sevenzip_supports_mt_extraction():
+    """
+    Returns True if the installed 7z is 7-Zip 18.03 or newer, the first release that decodes
+    LZMA2 on multiple threads. Older builds (such as p7zip 16.02) get no -mmt switch.
+    """
+    try:
+        banner = subprocess.run(["7z"], capture_output=True, text=True).stdout
+    except OSError:
+        return False
+    match = SEVENZIP_VERSION_RE.search(banner)
+    return bool(match) and (int(match.group(1)), int(match.group(2))) >= (18, 3)
+
+def select_archive_members(names, patterns):
+    """
+    Returns the archive member names matched by any of the --only patterns, the way `7z x -r`
+    matches them: against the full path or the file name, including everything below a
+    matched directory.
+    """
+    matched = {name for name in names
+               if any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(name.rsplit('/', 1)[-1], p) for p in patterns)}
+    selected = []
+    for name in names:
+        parent = name
+        while parent and parent not in matched:
+            parent = parent.rpartition('/')[0]
+        if parent:
+            selected.append(name)
+    return selected
+
+def extract_with_py7zr(archive_path, target_path, password, only=None):
+    """
+    Extracts an archive in-process with py7zr, for hosts without the 7z binary.
+    only limits the extraction to members matching those patterns (see select_archive_members).
+    Returns False if py7zr is not installed.
+    """
+    try:
+        import py7zr
+    except ImportError:
+        return False
+
+    # A backup is one solid LZMA2 stream, so splitting the file list across several handles
+    # would make every worker decode the stream from its start; one pass is fastest.
+    with py7zr.SevenZipFile(archive_path, mode='r', password=password) as archive:
+        if only:
+            archive.extract(path=target_path, targets=select_archive_members(archive.getnames(), only))
+        else:
+            archive.extractall(path=target_path)
+    return True
+
+def restore_backup(archive_file_path, target_dir, password, threads=None, verbose=False, only=None):
+    """
+    Restores a backup from a .7z file to the target directory.
+    threads caps the number of 7z decompression threads (None uses all CPU cores).
+    verbose shows 7z's file listing and progress; otherwise only its errors are printed.
+    only is a list of 7z wildcard patterns; when given, just the matching files are restored.
+    """
     archive_path = Path(archive_file_path)
     target_path = Path(target_dir)
 
@@ -193,32 +519,76 @@ def restore_backup(archive_file_path, target_dir, password):
 
     print(f"Extracting {archive_path} to {target_path}...")
     try:
-        # 7z x: extract with full paths, -p: password, -aoa: overwrite all existing files
+        # 7z x: extract with full paths, -p: password, -mmt: decompression threads, -aoa: overwrite all existing files
         # Timestamps are preserved by default with 7z extraction
         command = [
             "7z", "x",
             f"-p{password}",
             str(archive_path),
             f"-o{target_path}",
-            "-aoa" # Overwrite all existing files without prompt
+            "-aoa", # Overwrite all existing files without prompt
+            "-y" # Assume yes for any other prompt, so a restore never blocks on input
         ]
-        result = subprocess.run(command, capture_output=True, text=True, check=True)
-        print(result.stdout)
-        if result.stderr:
-            print(f"7z stderr: {result.stderr}")
+        if sevenzip_supports_mt_extraction():
+            command.append(f"-mmt={threads or max(1, os.cpu_count() or 2)}")
+        if not verbose:
+            # No file listing or progress, errors still go to stderr
+            command.extend(["-bso0", "-bsp0", "-bse2"])
+        elif not _TTY:
+            command.append("-bd") # No percentage indicator when the output goes to a log or pipe
+        if os.name == 'nt':
+            command.append("-slp") # Large memory pages for the LZMA dictionary (Windows only)
+        if only:
+            # -r matches the patterns in every directory; -- keeps a pattern starting with '-' from being read as a switch
+            command.extend(["-r", "--", *only])
+        # 7z inherits our stdout/stderr, so its output streams straight to the terminal instead of
+        # being buffered in memory (the file listing of a large archive can be hundreds of MB).
+        subprocess.run(command, check=True)
         print("Extraction complete.")
 
         print("\nRestore process complete!")
 
     except subprocess.CalledProcessError as e:
-        print(f"Error: 7z extraction failed. Return code: {e.returncode}")
-        print(f"Stdout: {e.stdout}")
-        print(f"Stderr: {e.stderr}")
+        print(f"Error: 7z extraction failed with return code {e.returncode}. See output above for details.")
     except FileNotFoundError:
-        print("Error: '7z' command not found. Please ensure p7zip is installed and in your PATH.")
+        print("'7z' command not found. Trying the py7zr library instead...")
+        try:
+            if extract_with_py7zr(archive_path, target_path, password, only):
+                print("Extraction complete.")
+                print("\nRestore process complete!")
+            else:
+                print("Error: Neither the '7z' command nor the py7zr library is available. "
+                      "Please install p7zip (pkg install p7zip) or py7zr (pip install py7zr).")
+        except Exception as e:
+            print(f"Error: py7zr extraction failed: {e}")
     except Exception as e:
         print(f"An unexpected error occurred during restore: {e}")
 
+def choose_staging_dir(target_dir, archive_size):
+    """
+    Picks where a downloaded archive is stored until it has been extracted.
+
+    Uses TMPFS_STAGING_DIR when it exists and has TMPFS_HEADROOM times the archive size free,
+    otherwise the parent of target_dir (the previous download location).
+    """
+    if os.path.isdir(TMPFS_STAGING_DIR):
+        try:
+            if shutil.disk_usage(TMPFS_STAGING_DIR).free > archive_size * TMPFS_HEADROOM:
+                return Path(TMPFS_STAGING_DIR)
+        except OSError:
+            pass
+    return Path(target_dir).parent
+
+def positive_int(value):
+    """argparse type for counts and sizes that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {number}")
+    return number
+
 def main():
     parser = argparse.ArgumentParser(description="Restore a backup from a .7z file.")
     parser.add_argument("--archive_file", help="Path to a local .7z archive to restore.")
@@ -226,24 +596,50 @@ def main():
                         help="The directory where the backup should be restored (default: current_dir/restored_data)")
     parser.add_argument("--from_drive", action="store_true",
                         help="List and download a backup from Google Drive before restoring.")
+    parser.add_argument("--threads", type=positive_int, default=None,
+                        help="Number of 7z decompression threads (default: all CPU cores). Lower it to leave "
+                             "CPU and RAM for other apps")
+    parser.add_argument("--verbose", action="store_true",
+                        help="Show 7z's file listing and progress while extracting (default: errors only)")
+    parser.add_argument("--only", nargs='+', default=None, metavar="PATTERN",
+                        help="Restore only archive paths matching these wildcard patterns, e.g. "
+                             "--only 'DCIM/*' '*.pdf' (default: everything)")
+    parser.add_argument("--chunk-size-mib", type=positive_int, default=DEFAULT_CHUNK_SIZE_MIB,
+                        help="Google Drive download chunk size in MiB (default: %(default)s). Each chunk is one "
+                             "HTTP range request")
+    parser.add_argument("--connections", type=positive_int, default=DEFAULT_CONNECTIONS,
+                        help="Number of parallel Google Drive download connections (default: %(default)s)")
+    parser.add_argument("--keep-archive", action="store_true",
+                        help="Keep the downloaded archive in the staging directory after restoring, and reuse it "
+                             "instead of downloading again when it is still complete and matches Drive")
+    parser.add_argument("--staging-dir", default=None,
+                        help="Directory to download the archive to before extraction (default: /dev/shm if the "
+                             "archive fits there, else the parent of --target_dir)")
     
     args = parser.parse_args()
 
     if args.from_drive:
+        from googleapiclient.discovery import build
+
         creds = authenticate_google_drive()
         if not creds:
             print("Google Drive authentication failed. Cannot list/download from Drive.")
             return
 
-        backups = list_drive_backups(creds, DRIVE_FOLDER_NAME)
+        # One service and one pooled HTTP session serve every Drive call of this run, so TLS
+        # connections are reused instead of re-established per call.
+        service = build('drive', 'v3', credentials=creds)
+        session = create_drive_session(creds, args.connections)
+
+        backups = list_drive_backups(service, DRIVE_FOLDER_NAME)
         if not backups:
             print("No .7z backups found in Google Drive.")
             return
 
         print("\nAvailable Backups on Google Drive:")
         for i, b in enumerate(backups):
-            size_gb = float(b.get('size', 0)) / (1024**3)
-            mod_time = datetime.fromisoformat(b.get('modifiedTime').replace('Z', '+00:00')).strftime('%Y-%m-%d %H:%M:%S')
+            size_gb = b['_size_bytes'] / _GB
+            mod_time = b['_mtime'].strftime('%Y-%m-%d %H:%M:%S')
             print(f"{i+1}) {b.get('name')} (Size: {size_gb:.2f} GB, Modified: {mod_time})")
         
         while True:
@@ -257,20 +653,46 @@ def main():
             except ValueError:
                 print("Invalid input. Please enter a number.")
 
-        download_path = Path(args.target_dir).parent / selected_backup['name'] # Download to parent of target_dir
-        Path(args.target_dir).parent.mkdir(parents=True, exist_ok=True)
+        if args.staging_dir:
+            staging_dir = Path(args.staging_dir)
+        elif args.keep_archive:
+            staging_dir = Path(args.target_dir).parent # A kept archive should outlive a reboot, so not tmpfs
+        else:
+            staging_dir = choose_staging_dir(args.target_dir, selected_backup['_size_bytes'])
+        staging_dir.mkdir(parents=True, exist_ok=True)
+        if args.keep_archive:
+            download_path = staging_dir / selected_backup['name']
+        else:
+            # A uniquely named temp file: concurrent restores cannot clobber each other, and the
+            # finally below removes it even when the download or the extraction fails.
+            with tempfile.NamedTemporaryFile(dir=staging_dir, prefix=f"{selected_backup['name']}.",
+                                             suffix='.7z', delete=False) as tmp:
+                download_path = Path(tmp.name)
+        try:
+            if selected_backup.get('manifest'):
+                downloaded = download_parts_from_drive(service, session, selected_backup['id'], download_path,
+                                                       args.chunk_size_mib, args.connections, resume=args.keep_archive)
+            elif args.keep_archive and is_local_copy_valid(download_path, selected_backup):
+                print(f"Local copy verified, skipping download: {download_path}")
+                downloaded = True
+            else:
+                downloaded = download_file_from_drive(session, selected_backup['id'], selected_backup['name'], download_path,
+                                                      selected_backup['_size_bytes'], args.chunk_size_mib, args.connections)
 
-        if download_file_from_drive(selected_backup['id'], selected_backup['name'], download_path, creds, int(selected_backup['size'])):
-            restore_backup(download_path, args.target_dir, COMPRESSION_PASSWORD)
-            # Optional: Clean up downloaded archive after successful restore
+            if downloaded:
+                restore_backup(download_path, args.target_dir, COMPRESSION_PASSWORD, args.threads, args.verbose, args.only)
+            else:
+                print("Failed to download backup from Google Drive.")
+        finally:
             if download_path.exists():
-                os.remove(download_path)
-                print(f"Cleaned up downloaded archive: {download_path}")
-        else:
-            print("Failed to download backup from Google Drive.")
+                if args.keep_archive:
+                    print(f"Kept downloaded archive: {download_path}")
+                else:
+                    os.unlink(download_path)
+                    print(f"Cleaned up downloaded archive: {download_path}")
 
     elif args.archive_file:
-        restore_backup(Path(args.archive_file), Path(args.target_dir), COMPRESSION_PASSWORD)
+        restore_backup(Path(args.archive_file), Path(args.target_dir), COMPRESSION_PASSWORD, args.threads, args.verbose, args.only)
     else:
         parser.print_help()
         print("\nError: You must specify either --archive_file or --from_drive.")